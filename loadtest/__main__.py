@@ -0,0 +1,83 @@
+"""Open-loop load test of the Briefly API against local Supabase and S3 stand-ins.
+
+    python -m loadtest --rates 5,10,20,40 --duration 20 --mix login=1,save-summary=1,user-history=2
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from loadtest.environment import AppServer, offline_backends
+from loadtest.runner import RequestFactory, format_report, parse_mix, run_stage, stage_summary
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test', 'sample.pdf')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='python -m loadtest', description=__doc__.splitlines()[0])
+    parser.add_argument('--rates', default='5,10,20,40',
+                        help='comma-separated arrival rates (req/s), one stage per rate')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds per stage')
+    parser.add_argument('--mix', default='login=1,save-summary=1,user-history=2',
+                        help='route weights, e.g. login=1,save-summary=1,user-history=2')
+    parser.add_argument('--arrival', choices=('poisson', 'constant'), default='poisson')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='max open client connections (default: unbounded)')
+    parser.add_argument('--p99-slo-ms', type=float, default=1000.0,
+                        help='p99 latency above which a stage counts as saturated')
+    parser.add_argument('--pdf', default=DEFAULT_PDF, help='PDF uploaded by save-summary')
+    parser.add_argument('--summary-type', choices=('static', 'deep'), default='static')
+    parser.add_argument('--max-length', type=int, default=3)
+    parser.add_argument('--db-latency-ms', type=float, default=0.0,
+                        help='artificial round-trip delay added by the fake PostgREST')
+    parser.add_argument('--write-behind', action='store_true',
+                        help='persist summaries through the batched summary writer')
+    parser.add_argument('--load-models', action='store_true',
+                        help='run the app startup hook so ML models load before the test')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', dest='json_path', help='also write the report as JSON to this path')
+    return parser
+
+
+async def run(args, base_url: str) -> list:
+    with open(args.pdf, 'rb') as f:
+        factory = RequestFactory(f.read(), summary_type=args.summary_type, max_length=args.max_length)
+    mix = parse_mix(args.mix)
+
+    stages = []
+    for rate in (float(r) for r in args.rates.split(',') if r.strip()):
+        print(f'-- Stage: {rate:.1f} req/s for {args.duration:.0f}s --')
+        stages.append(await run_stage(
+            base_url, factory, mix, rate, args.duration,
+            arrival=args.arrival, concurrency=args.concurrency, seed=args.seed,
+        ))
+    return stages
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    p99_slo = args.p99_slo_ms / 1000
+
+    with offline_backends(db_latency=args.db_latency_ms / 1000):
+        from main import app
+        from services.summary_writer import summary_writer
+
+        if args.write_behind:
+            summary_writer.spool_path = os.path.join(tempfile.mkdtemp(prefix='briefly-spool-'), 'spool.jsonl')
+            summary_writer.start()
+        server = AppServer(app, load_models=args.load_models).start()
+        try:
+            stages = asyncio.run(run(args, server.base_url))
+        finally:
+            server.stop()
+            summary_writer.close()
+
+    print(format_report(stages, p99_slo))
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'p99_slo_ms': args.p99_slo_ms, 'stages': [stage_summary(s) for s in stages]}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""CPU time of N independent deep summaries vs one shared encoder pass.
+
+    python -m loadtest.bench_multi_length --lengths 60,120,200 --repeat 3
+    python -m loadtest.bench_multi_length --tiny   # offline: random-weight BART with a 12/6 layer split
+"""
+import argparse
+import os
+import time
+from unittest.mock import patch
+
+import torch
+
+import ml.deep_model as deep_model
+from services.pdf_preprocessing import process_pdf
+
+DEFAULT_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'test', 'sample.pdf')
+
+
+def tiny_model(text: str):
+    """A randomly initialised BART shaped like distilbart-cnn-12-6, with a tokenizer built from `text`."""
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from transformers import BartConfig, BartForConditionalGeneration, PreTrainedTokenizerFast
+
+    specials = ['<s>', '<pad>', '</s>', '<unk>']
+    words = sorted(set(text.lower().split()))
+    vocab = {token: i for i, token in enumerate(specials + words)}
+    backend = Tokenizer(models.WordLevel(vocab, unk_token='<unk>'))
+    backend.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer = PreTrainedTokenizerFast(
+        tokenizer_object=backend, model_max_length=1024,
+        bos_token='<s>', pad_token='<pad>', eos_token='</s>', unk_token='<unk>',
+    )
+
+    torch.manual_seed(0)
+    config = BartConfig(
+        vocab_size=len(vocab), d_model=256, encoder_layers=12, decoder_layers=6,
+        encoder_attention_heads=4, decoder_attention_heads=4,
+        encoder_ffn_dim=1024, decoder_ffn_dim=1024, max_position_embeddings=1024,
+        bos_token_id=0, pad_token_id=1, eos_token_id=2, decoder_start_token_id=2,
+        forced_bos_token_id=0,
+    )
+    model = BartForConditionalGeneration(config).eval()
+    return tokenizer, model
+
+
+def timed(fn):
+    torch.manual_seed(0)
+    cpu, wall = time.process_time(), time.perf_counter()
+    result = fn()
+    return result, time.process_time() - cpu, time.perf_counter() - wall
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest.bench_multi_length', description=__doc__.splitlines()[0])
+    parser.add_argument('--lengths', default='60,120,200', help='comma-separated max_length values')
+    parser.add_argument('--pdf', default=DEFAULT_PDF)
+    parser.add_argument('--model', default=deep_model.DEFAULT_MODEL, help='registry model name')
+    parser.add_argument('--tiny', action='store_true', help='use a random-weight model instead (no download)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    lengths = [int(n) for n in args.lengths.split(',')]
+    with open(args.pdf, 'rb') as f:
+        text = process_pdf(f.read())
+
+    loaded = tiny_model(text) if args.tiny else deep_model.load(args.model)
+    if not loaded[1]:
+        raise SystemExit(f'Could not load {args.model}; try --tiny')
+
+    with patch('ml.deep_model.load', return_value=loaded):
+        # Warm-up so one-off allocations are not charged to either side
+        deep_model.predict_many(text, lengths[:1])
+
+        independent, shared = [0.0, 0.0], [0.0, 0.0]
+        for _ in range(args.repeat):
+            one_by_one, cpu, wall = timed(lambda: [deep_model.predict(text, n) for n in lengths])
+            independent[0] += cpu
+            independent[1] += wall
+            together, cpu, wall = timed(lambda: deep_model.predict_many(text, lengths))
+            shared[0] += cpu
+            shared[1] += wall
+            # Same seed, same decoder work: only the encoder pass differs
+            assert one_by_one == together, 'shared-encoder summaries differ from independent calls'
+
+    tokens = loaded[0](text, truncation=True, max_length=loaded[0].model_max_length)['input_ids']
+    print(f'{len(lengths)} lengths {lengths}, {len(tokens)} input tokens, {args.repeat} runs, '
+          f'model {"tiny" if args.tiny else args.model}')
+    print(f"{'mode':<22} {'cpu s/run':>10} {'wall s/run':>11}")
+    print(f"{'independent predict':<22} {independent[0] / args.repeat:>10.3f} {independent[1] / args.repeat:>11.3f}")
+    print(f"{'predict_many':<22} {shared[0] / args.repeat:>10.3f} {shared[1] / args.repeat:>11.3f}")
+    print(f'CPU time saved: {100 * (1 - shared[0] / independent[0]):.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Summary insert throughput: one insert per row vs the write-behind batcher.
+
+    python -m loadtest.bench_writes --rows 2000 --concurrency 32 --db-latency-ms 20
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from loadtest.environment import offline_backends
+
+
+def _save(i: int, wait_for_commit: bool):
+    from services.user_services import save_summary_main
+    return save_summary_main(
+        user_id=1,
+        filename=f'bench_{i}.pdf',
+        summary='Benchmark summary text. ' * 20,
+        s3_url=f'https://bench.s3.amazonaws.com/bench_{i}.pdf',
+        summary_type='static',
+        summary_length=3,
+        wait_for_commit=wait_for_commit,
+    )
+
+
+def run_case(postgrest, rows: int, concurrency: int, writer=None, wait_for_commit: bool = True) -> dict:
+    inserted_before = postgrest.store.count('summaries')
+    requests_before = postgrest.store.insert_requests
+
+    if writer:
+        writer.start()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda i: _save(i, wait_for_commit), range(rows)))
+    accepted = time.perf_counter() - started
+    if writer:
+        writer.close()
+    committed = time.perf_counter() - started
+
+    assert postgrest.store.count('summaries') - inserted_before == rows
+    return {
+        'accepted_rps': rows / accepted,
+        'committed_rps': rows / committed,
+        'insert_requests': postgrest.store.insert_requests - requests_before,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest.bench_writes', description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=32, help='threads calling save_summary_main')
+    parser.add_argument('--db-latency-ms', type=float, default=20.0,
+                        help='artificial round-trip delay added by the fake PostgREST')
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--flush-interval-ms', type=float, default=200.0)
+    args = parser.parse_args(argv)
+
+    with offline_backends(db_latency=args.db_latency_ms / 1000) as postgrest:
+        from services.summary_writer import SummaryWriter
+        import services.user_services as user_services
+
+        spool_dir = tempfile.mkdtemp(prefix='briefly-spool-')
+        results = {'direct insert': run_case(postgrest, args.rows, args.concurrency)}
+        for wait_for_commit in (True, False):
+            writer = SummaryWriter(
+                batch_size=args.batch_size,
+                flush_interval=args.flush_interval_ms / 1000,
+                spool_path=os.path.join(spool_dir, 'spool.jsonl'),
+            )
+            original = user_services.summary_writer
+            user_services.summary_writer = writer
+            try:
+                label = 'write-behind (wait)' if wait_for_commit else 'write-behind (no wait)'
+                results[label] = run_case(postgrest, args.rows, args.concurrency, writer, wait_for_commit)
+            finally:
+                user_services.summary_writer = original
+
+    print(f'{args.rows} rows, {args.concurrency} threads, {args.db_latency_ms:.0f} ms DB round trip, '
+          f'batch {args.batch_size} / {args.flush_interval_ms:.0f} ms')
+    print(f"{'mode':<24} {'accepted/s':>11} {'committed/s':>12} {'inserts':>8}")
+    for label, r in results.items():
+        print(f"{label:<24} {r['accepted_rps']:>11.0f} {r['committed_rps']:>12.0f} {r['insert_requests']:>8}")
+
+
+if __name__ == '__main__':
+    main()
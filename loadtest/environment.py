@@ -0,0 +1,129 @@
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+import boto3
+import uvicorn
+from moto import mock_aws
+
+from core.security import hash_password
+from loadtest.fake_postgrest import FakePostgREST
+
+LOADTEST_BUCKET = 'briefly-loadtest'
+LOADTEST_USER = {
+    'name': 'Load Tester',
+    'email': 'loadtest@briefly.dev',
+    'password': 'loadtest123',
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class AppServer:
+    """Runs the FastAPI app under uvicorn in a background thread."""
+
+    def __init__(self, app, load_models: bool = False, port: int = None):
+        self.port = port or _free_port()
+        config = uvicorn.Config(
+            app,
+            host='127.0.0.1',
+            port=self.port,
+            lifespan='on' if load_models else 'off',
+            log_level='warning',
+            access_log=False,
+        )
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self, timeout: float = 300.0):
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if not self._thread.is_alive():
+                raise RuntimeError('App server exited during startup')
+            if time.monotonic() > deadline:
+                raise RuntimeError('App server did not start in time')
+            time.sleep(0.05)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+@contextmanager
+def offline_backends(db_latency: float = 0.0):
+    """Point the app's Supabase and S3 clients at local stand-ins.
+
+    Starts a FakePostgREST server seeded with LOADTEST_USER (id 1) and one of
+    their summaries plus a moto S3 bucket, then swaps `database.supabase.supabase`,
+    `services.user_services.supabase` and `services.s3.s3_client` for clients
+    bound to them. Yields the fake PostgREST so callers can inspect what was
+    written.
+    """
+    os.environ.update({
+        'AWS_ACCESS_KEY_ID': 'testing',
+        'AWS_SECRET_ACCESS_KEY': 'testing',
+        'AWS_SESSION_TOKEN': 'testing',
+        'AWS_DEFAULT_REGION': 'us-east-1',
+        'AWS_REGION': 'us-east-1',
+        'S3_BUCKET_NAME': LOADTEST_BUCKET,
+    })
+
+    with FakePostgREST(latency=db_latency) as postgrest, mock_aws():
+        # database.supabase builds its client at import time, so it must see the fake URL first
+        os.environ['DATABASE_URL'] = postgrest.url
+        os.environ['DATABASE_KEY'] = 'fake-postgrest-key'
+
+        import database.supabase as db_module
+        import services.user_services as user_services
+        import services.s3 as s3_module
+
+        client = postgrest.client()
+        s3_client = boto3.client('s3', region_name='us-east-1')
+        s3_client.create_bucket(Bucket=LOADTEST_BUCKET)
+
+        postgrest.store.insert('users', [{
+            'name': LOADTEST_USER['name'],
+            'email': LOADTEST_USER['email'],
+            'password': hash_password(LOADTEST_USER['password']),
+        }])
+        # get_user_history raises on an empty history, so give the user one summary up front
+        postgrest.store.insert('summaries', [{
+            'user_id': 1,
+            'filename': 'seed.pdf',
+            'summary': 'Seed summary.',
+            'summary_type': 'static',
+            'summary_length': 1,
+            's3_url': f'https://{LOADTEST_BUCKET}.s3.us-east-1.amazonaws.com/seed.pdf',
+        }])
+
+        originals = (
+            db_module.supabase,
+            user_services.supabase,
+            s3_module.s3_client,
+            s3_module.BUCKET_NAME,
+        )
+        db_module.supabase = client
+        user_services.supabase = client
+        s3_module.s3_client = s3_client
+        s3_module.BUCKET_NAME = LOADTEST_BUCKET
+        try:
+            yield postgrest
+        finally:
+            (
+                db_module.supabase,
+                user_services.supabase,
+                s3_module.s3_client,
+                s3_module.BUCKET_NAME,
+            ) = originals
@@ -0,0 +1,181 @@
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qsl
+
+from supabase import create_client, Client
+
+SINGLE_OBJECT_MEDIA_TYPE = 'application/vnd.pgrst.object+json'
+
+
+class FakeStore:
+    """Thread-safe in-memory tables with auto-increment ids, enough to stand in for PostgREST."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._next_id = {}
+        self.insert_requests = 0
+
+    def insert(self, table: str, rows: list) -> list:
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self.insert_requests += 1
+            stored = []
+            for row in rows:
+                row = dict(row)
+                if 'id' not in row:
+                    row['id'] = self._next_id.get(table, 1)
+                self._next_id[table] = max(self._next_id.get(table, 1), row['id'] + 1)
+                row.setdefault('created_at', now)
+                self._tables.setdefault(table, []).append(row)
+                stored.append(row)
+            return [dict(r) for r in stored]
+
+    def select(self, table: str, filters: list, order: str = None) -> list:
+        with self._lock:
+            rows = [dict(r) for r in self._tables.get(table, [])]
+
+        for column, op, value in filters:
+            if op != 'eq':
+                raise ValueError(f'Unsupported filter operator: {op}')
+            rows = [r for r in rows if str(r.get(column)) == value]
+
+        if order:
+            for clause in reversed(order.split(',')):
+                column, _, direction = clause.partition('.')
+                rows.sort(key=lambda r: str(r.get(column, '')), reverse=direction.startswith('desc'))
+        return rows
+
+    def count(self, table: str) -> int:
+        with self._lock:
+            return len(self._tables.get(table, []))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # The stdlib default backlog of 5 resets connections under concurrent load
+    request_queue_size = 1024
+
+
+class _PostgRESTHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this Nagle adds ~40 ms per response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def _table(self):
+        path = urlparse(self.path).path
+        prefix = '/rest/v1/'
+        if not path.startswith(prefix):
+            return None
+        return path[len(prefix):].strip('/')
+
+    def _send(self, status_code: int, payload=None):
+        body = b'' if payload is None else json.dumps(payload).encode()
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _error(self, status_code: int, code: str, message: str):
+        self._send(status_code, {'code': code, 'message': message, 'details': None, 'hint': None})
+
+    def _delay(self):
+        latency = self.server.latency
+        if latency:
+            time.sleep(latency)
+
+    def do_GET(self):
+        self._delay()
+        table = self._table()
+        if not table:
+            return self._error(404, 'PGRST125', 'Invalid path')
+
+        filters, order = [], None
+        for key, value in parse_qsl(urlparse(self.path).query, keep_blank_values=True):
+            if key == 'select':
+                continue
+            if key == 'order':
+                order = value
+                continue
+            op, _, operand = value.partition('.')
+            filters.append((key, op, operand))
+
+        try:
+            rows = self.server.store.select(table, filters, order)
+        except ValueError as e:
+            return self._error(400, 'PGRST100', str(e))
+
+        if SINGLE_OBJECT_MEDIA_TYPE in self.headers.get('Accept', ''):
+            if len(rows) != 1:
+                return self._error(
+                    406, 'PGRST116',
+                    'JSON object requested, multiple (or no) rows returned'
+                )
+            return self._send(200, rows[0])
+        return self._send(200, rows)
+
+    def do_POST(self):
+        self._delay()
+        table = self._table()
+        if not table:
+            return self._error(404, 'PGRST125', 'Invalid path')
+
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'null')
+        except json.JSONDecodeError:
+            return self._error(400, 'PGRST102', 'Invalid JSON body')
+
+        rows = payload if isinstance(payload, list) else [payload]
+        stored = self.server.store.insert(table, rows)
+
+        if 'return=representation' in self.headers.get('Prefer', ''):
+            return self._send(201, stored)
+        return self._send(201)
+
+
+class FakePostgREST:
+    """Serves a FakeStore over HTTP on localhost so a real supabase Client can talk to it.
+
+    `latency` adds a fixed per-request delay to emulate the network round trip
+    to a hosted Supabase instance.
+    """
+
+    def __init__(self, latency: float = 0.0, host: str = '127.0.0.1', port: int = 0):
+        self.store = FakeStore()
+        self._server = _Server((host, port), _PostgRESTHandler)
+        self._server.store = self.store
+        self._server.latency = latency
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def client(self) -> Client:
+        return create_client(self.url, 'fake-postgrest-key')
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,255 @@
+import asyncio
+import math
+import random
+import time
+from dataclasses import dataclass, field
+
+import httpx
+
+from loadtest.environment import LOADTEST_USER
+
+ROUTES = ('login', 'save-summary', 'user-history')
+
+
+@dataclass
+class Sample:
+    route: str
+    latency: float
+    status_code: int
+    finished: float  # seconds since the stage started
+
+
+@dataclass
+class StageResult:
+    offered_rps: float
+    duration: float
+    elapsed: float
+    arrivals: int = 0  # requests actually scheduled; Poisson stages vary around offered_rps * duration
+    samples: list = field(default_factory=list)
+
+    @property
+    def completed(self) -> int:
+        return len(self.samples)
+
+    @property
+    def errors(self) -> int:
+        return sum(1 for s in self.samples if not 200 <= s.status_code < 300)
+
+    @property
+    def achieved_rps(self) -> float:
+        """Successful completion rate inside the offered window, once the first response is back.
+
+        Requests still in flight when arrivals stop are drained but not counted
+        (see `drain`), and measuring from the first completion keeps a long but
+        steady latency from reading as lost throughput.
+        """
+        finished = sorted(
+            s.finished for s in self.samples
+            if 200 <= s.status_code < 300 and s.finished <= self.duration
+        )
+        if len(finished) < 2:
+            return len(finished) / self.duration if self.duration else 0.0
+        span = finished[-1] - finished[0]
+        return (len(finished) - 1) / span if span else 0.0
+
+    @property
+    def served_in_window(self) -> int:
+        return sum(1 for s in self.samples if 200 <= s.status_code < 300 and s.finished <= self.duration)
+
+    @property
+    def drain(self) -> float:
+        """Seconds spent waiting for in-flight requests after the last arrival."""
+        return max(0.0, self.elapsed - self.duration)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.completed if self.completed else 0.0
+
+    def latencies(self, route: str = None) -> list:
+        return sorted(s.latency for s in self.samples if route is None or s.route == route)
+
+
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float('nan')
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def parse_mix(spec: str) -> dict:
+    """Parse a request mix like 'login=1,save-summary=2,user-history=3' into weights."""
+    mix = {}
+    for part in spec.split(','):
+        route, _, weight = part.partition('=')
+        route = route.strip()
+        if route not in ROUTES:
+            raise ValueError(f'Unknown route in mix: {route!r} (expected one of {", ".join(ROUTES)})')
+        mix[route] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError('Request mix needs at least one positive weight')
+    return mix
+
+
+class RequestFactory:
+    """Builds the HTTP calls for each route against the seeded load-test user."""
+
+    def __init__(self, pdf_bytes: bytes, summary_type: str = 'static', max_length: int = 3, user_id: int = 1):
+        self.pdf_bytes = pdf_bytes
+        self.summary_type = summary_type
+        self.max_length = max_length
+        self.user_id = user_id
+
+    async def send(self, client: httpx.AsyncClient, route: str) -> httpx.Response:
+        if route == 'login':
+            return await client.post('/users/login', json={
+                'email': LOADTEST_USER['email'],
+                'password': LOADTEST_USER['password'],
+            })
+        if route == 'save-summary':
+            return await client.post(
+                '/summary/save-summary',
+                data={
+                    'user_id': str(self.user_id),
+                    'summary_type': self.summary_type,
+                    'max_length': str(self.max_length),
+                },
+                files={'file': ('loadtest.pdf', self.pdf_bytes, 'application/pdf')},
+            )
+        return await client.get(f'/summary/user-history/{self.user_id}')
+
+
+async def run_stage(
+    base_url: str,
+    factory: RequestFactory,
+    mix: dict,
+    rate: float,
+    duration: float,
+    arrival: str = 'poisson',
+    concurrency: int = None,
+    timeout: float = 60.0,
+    seed: int = None,
+) -> StageResult:
+    """Fire requests open-loop at `rate` per second for `duration` seconds.
+
+    Arrivals follow the schedule regardless of whether earlier requests have
+    finished, and latency is measured from the scheduled send time so queueing
+    inside the client is charged to the server (no coordinated omission).
+    `concurrency` caps open connections; arrivals beyond it wait for a free
+    connection and that wait counts towards their latency.
+    """
+    rng = random.Random(seed)
+    routes, weights = zip(*mix.items())
+    result = StageResult(offered_rps=rate, duration=duration, elapsed=0.0)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeouts = httpx.Timeout(timeout, pool=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeouts, limits=limits) as client:
+
+        async def fire(route: str, scheduled: float):
+            try:
+                response = await factory.send(client, route)
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = 0
+            now = time.perf_counter()
+            result.samples.append(Sample(route, now - scheduled, status_code, now - start))
+
+        tasks = []
+        start = time.perf_counter()
+        offset = 0.0
+        while True:
+            offset += rng.expovariate(rate) if arrival == 'poisson' else 1.0 / rate
+            if offset >= duration:
+                break
+            delay = start + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            route = rng.choices(routes, weights)[0]
+            tasks.append(asyncio.create_task(fire(route, start + offset)))
+
+        result.arrivals = len(tasks)
+        await asyncio.gather(*tasks)
+        result.elapsed = time.perf_counter() - start
+    return result
+
+
+def is_saturated(stage: StageResult, p99_slo: float, min_ratio: float = 0.9, max_error_rate: float = 0.01) -> bool:
+    """A stage is saturated when it serves too few of its arrivals in time, errors pile up or p99 breaks the SLO."""
+    # Compare with the realized arrivals, not the nominal rate: a Poisson stage can simply send fewer
+    if stage.served_in_window < stage.arrivals * min_ratio:
+        return True
+    if stage.error_rate > max_error_rate:
+        return True
+    return percentile(stage.latencies(), 99) > p99_slo
+
+
+def find_saturation(stages: list, p99_slo: float) -> tuple:
+    """Return (highest sustained rate, first saturated rate); either may be None."""
+    sustained = None
+    for stage in sorted(stages, key=lambda s: s.offered_rps):
+        if is_saturated(stage, p99_slo):
+            return sustained, stage.offered_rps
+        sustained = stage.offered_rps
+    return sustained, None
+
+
+def stage_summary(stage: StageResult) -> dict:
+    per_route = {}
+    for route in ROUTES:
+        lat = stage.latencies(route)
+        if not lat:
+            continue
+        per_route[route] = {
+            'count': len(lat),
+            'p50_ms': percentile(lat, 50) * 1000,
+            'p95_ms': percentile(lat, 95) * 1000,
+            'p99_ms': percentile(lat, 99) * 1000,
+        }
+    lat = stage.latencies()
+    return {
+        'offered_rps': stage.offered_rps,
+        'arrivals': stage.arrivals,
+        'achieved_rps': stage.achieved_rps,
+        'completed': stage.completed,
+        'errors': stage.errors,
+        'drain_s': stage.drain,
+        'p50_ms': percentile(lat, 50) * 1000,
+        'p95_ms': percentile(lat, 95) * 1000,
+        'p99_ms': percentile(lat, 99) * 1000,
+        'routes': per_route,
+    }
+
+
+def format_report(stages: list, p99_slo: float) -> str:
+    if not stages:
+        return 'No stages ran.'
+
+    lines = [
+        f"{'offered':>8} {'achieved':>9} {'sent':>6} {'done':>6} {'err':>5} {'drain s':>8} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  route",
+    ]
+    for stage in stages:
+        summary = stage_summary(stage)
+        lines.append(
+            f"{summary['offered_rps']:>8.1f} {summary['achieved_rps']:>9.1f} {summary['arrivals']:>6} {summary['completed']:>6} "
+            f"{summary['errors']:>5} {summary['drain_s']:>8.1f} "
+            f"{summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}  all"
+        )
+        for route, stats in summary['routes'].items():
+            lines.append(
+                f"{'':>8} {'':>9} {'':>6} {stats['count']:>6} {'':>5} {'':>8} {stats['p50_ms']:>9.1f} "
+                f"{stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}  {route}"
+            )
+
+    sustained, saturated = find_saturation(stages, p99_slo)
+    lines.append('')
+    if saturated is None:
+        lines.append(f'No saturation observed up to {sustained:.1f} req/s (p99 SLO {p99_slo * 1000:.0f} ms)')
+    elif sustained is None:
+        lines.append(f'Saturated at the lowest offered rate, {saturated:.1f} req/s (p99 SLO {p99_slo * 1000:.0f} ms)')
+    else:
+        lines.append(
+            f'Sustained {sustained:.1f} req/s; saturates at {saturated:.1f} req/s (p99 SLO {p99_slo * 1000:.0f} ms)'
+        )
+    return '\n'.join(lines)
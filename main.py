@@ -3,8 +3,11 @@ from schemas.user import UserSignUpModel
 from services.user_services import create_user
 from routers.auth import router as user_router
 from routers.summary import router as summary_router
+from routers.models import router as models_router
+from routers.profiling import router as profiling_router
 from ml.deep_model import load as deep_load
 from ml.static_model import load_model as static_load
+from services.summary_writer import summary_writer
 app = FastAPI()
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -19,6 +22,8 @@ app.add_middleware(
 
 app.include_router(user_router)
 app.include_router(summary_router)
+app.include_router(models_router)
+app.include_router(profiling_router)
 
 @app.on_event('startup')
 async def load_models():
@@ -26,6 +31,14 @@ async def load_models():
     static_load()
     print('All models loaded')
 
+@app.on_event('startup')
+async def start_summary_writer():
+    summary_writer.start()
+
+@app.on_event('shutdown')
+async def stop_summary_writer():
+    summary_writer.close()
+
 @app.get('/')
 def root():
     return {'message':'Hello FastAPI'}
@@ -1,50 +1,62 @@
-import os
 from transformers import AutoTokenizer, AutoModelForSeq2SeqLM
 import torch  # Import torch to handle device placement
 
-# Global variables
-tokenizer = None 
-model = None
+from ml.registry import registry, ModelSpec
 
-def load():
-    # FIX 1: Declare globals so we update the variables outside this function
-    global tokenizer, model
-    
+DEFAULT_MODEL = 'distilbart-cnn-12-6'
+
+# name -> (hub id, folder under ml/artifacts)
+DEEP_MODELS = {
+    'distilbart-cnn-12-6': ("sshleifer/distilbart-cnn-12-6", 'distilbart_model'),
+    # Smaller distilled variant, good enough for short documents
+    'distilbart-cnn-6-6': ("sshleifer/distilbart-cnn-6-6", 'distilbart_6_6_model'),
+    # Longformer encoder-decoder, accepts up to 16k input tokens
+    'led-base-book-summary': ("pszemraj/led-base-book-summary", 'led_base_model'),
+}
+
+
+def _load_seq2seq(load_path: str):
+    print(f'-- Loading Deep Model from: {load_path} --')
+    tokenizer = AutoTokenizer.from_pretrained(load_path)
+    model = AutoModelForSeq2SeqLM.from_pretrained(load_path)
+
+    # Optimization: Move to GPU if available
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    model.to(device)
+    model.eval()
+
+    print(f'-- Deep Summarizer model loaded successfully on {device} --')
+    return tokenizer, model
+
+
+def _resident_bytes(loaded) -> int:
+    _, model = loaded
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+for _name, (_source, _artifact_dir) in DEEP_MODELS.items():
+    registry.register(ModelSpec(
+        name=_name,
+        kind='deep',
+        source=_source,
+        artifact_dir=_artifact_dir,
+        loader=_load_seq2seq,
+        sizer=_resident_bytes,
+        marker='config.json',
+    ))
+
+
+def load(model_name: str = None):
+    """Return (tokenizer, model) from the registry, or (None, None) if loading failed."""
+    model_name = model_name or DEFAULT_MODEL
     try:
-        print('-- Checking Deep Model --')
-        base_path = os.path.dirname(os.path.abspath(__file__)) 
-        local_path = os.path.join(base_path, 'artifacts', 'distilbart_model')
-        
-        model_name = "sshleifer/distilbart-cnn-12-6"
-
-        if os.path.exists(os.path.join(local_path, "config.json")):
-            print(f'-- Loading from LOCAL path: {local_path} --')
-            load_path = local_path
-        else:
-            print(f'-- Local model not found. Downloading: {model_name} --')
-            load_path = model_name
-
-        tokenizer = AutoTokenizer.from_pretrained(load_path)
-        model = AutoModelForSeq2SeqLM.from_pretrained(load_path)
-        
-        # Optimization: Move to GPU if available
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        model.to(device)
-        
-        print(f'-- Deep Summarizer model loaded successfully on {device} --')
-        
+        return registry.get(model_name)
     except Exception as e:
-        print(f'-- CRITICAL ERROR loading deep model: {e} --')
-
-def predict(text: str, max_length: int ) -> str:
-    global tokenizer, model
-    
-    if not model or not tokenizer:
-        print("Model not loaded, attempting lazy load...")
-        load()
-        if not model:
-            return "Error: Deep Model failed to load."
+        print(f'-- CRITICAL ERROR loading deep model {model_name}: {e} --')
+        return None, None
 
+def _tokenize(tokenizer, model, text: str):
     # Preprocess
     clean_text = text.strip().replace("\n", " ")
     
@@ -54,19 +66,19 @@ def predict(text: str, max_length: int ) -> str:
 
 
     # Tokenize (Move inputs to the same device as model)
-    inputs = tokenizer(
+    return tokenizer(
         clean_text,
         max_length=max_input_length,
         truncation=True,
         return_tensors="pt"
     ).to(device)
 
-
+def _generate(model, max_length: int, **model_inputs):
     # FIX 2: Relax constraints. 
     # forcing min_length == max_length usually produces repetitive garbage.
     max_length = min(max_length, 200)
-    summary_ids = model.generate(
-    inputs["input_ids"],
+    return model.generate(
+    **model_inputs,
     max_length=max_length,
     min_length=int(max_length * 0.5),
     do_sample=True,
@@ -76,6 +88,42 @@ def predict(text: str, max_length: int ) -> str:
     repetition_penalty=1.2
 )
 
+def predict(text: str, max_length: int, model_name: str = None) -> str:
+    tokenizer, model = load(model_name)
+    if not model or not tokenizer:
+        return "Error: Deep Model failed to load."
+
+    inputs = _tokenize(tokenizer, model, text)
+    summary_ids = _generate(model, max_length, input_ids=inputs["input_ids"])
+
+    return tokenizer.decode(summary_ids[0], skip_special_tokens=True)
+
+def predict_many(text: str, max_lengths: list, model_name: str = None) -> list:
+    """Summaries for each of `max_lengths`, sharing one tokenization and encoder pass.
+
+    The decoder runs once per length against the cached encoder outputs, so
+    every extra length only costs its own decoding. Results follow the order
+    of `max_lengths`.
+    """
+    tokenizer, model = load(model_name)
+    if not model or not tokenizer:
+        return ["Error: Deep Model failed to load."] * len(max_lengths)
 
+    inputs = _tokenize(tokenizer, model, text)
+    with torch.no_grad():
+        encoder_outputs = model.get_encoder()(
+            input_ids=inputs["input_ids"],
+            attention_mask=inputs["attention_mask"],
+            return_dict=True
+        )
 
-    return tokenizer.decode(summary_ids[0], skip_special_tokens=True)
\ No newline at end of file
+    summaries = []
+    for max_length in max_lengths:
+        summary_ids = _generate(
+            model,
+            max_length,
+            encoder_outputs=encoder_outputs,
+            attention_mask=inputs["attention_mask"]
+        )
+        summaries.append(tokenizer.decode(summary_ids[0], skip_special_tokens=True))
+    return summaries
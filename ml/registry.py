@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Callable
+
+ARTIFACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'artifacts')
+DEFAULT_BUDGET_MB = 3072
+
+
+@dataclass
+class ModelSpec:
+    name: str
+    kind: str                     # 'deep' or 'static', matches SummaryType
+    source: str                   # hub id / package name used when no local artifact exists
+    artifact_dir: str             # folder under ml/artifacts checked first
+    loader: Callable[[str], Any]  # load_path -> loaded object
+    sizer: Callable[[Any], int]   # loaded object -> resident bytes
+    marker: str                   # file that must exist for the local artifact to count as complete
+
+    def load_path(self) -> str:
+        local_path = os.path.join(ARTIFACTS_DIR, self.artifact_dir)
+        # An empty or half-copied artifact folder falls back to the hub / package
+        if os.path.exists(os.path.join(local_path, self.marker)):
+            return local_path
+        return self.source
+
+
+@dataclass
+class _Entry:
+    obj: Any
+    resident_bytes: int
+    loaded_at: float
+    last_used: float
+
+
+class ModelRegistry:
+    """Loads registered models on demand and keeps them under a RAM budget.
+
+    Models are held in least-recently-used order; once the summed resident
+    size of loaded models exceeds the budget the oldest ones are dropped.
+    Callers that already hold a model keep using it after eviction, the
+    memory is released once their reference goes away.
+    """
+
+    def __init__(self, budget_bytes: int, max_events: int = 100):
+        self.budget_bytes = budget_bytes
+        self._specs = {}
+        self._loaded = OrderedDict()
+        self._known_sizes = {}
+        self._lock = threading.RLock()
+        self._load_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+        self.evictions = 0
+        self.events = deque(maxlen=max_events)
+
+    def register(self, spec: ModelSpec):
+        with self._lock:
+            self._specs[spec.name] = spec
+            self._load_locks.setdefault(spec.name, threading.Lock())
+
+    def names(self, kind: str = None) -> list:
+        return [name for name, spec in self._specs.items() if kind is None or spec.kind == kind]
+
+    def is_registered(self, name: str, kind: str = None) -> bool:
+        spec = self._specs.get(name)
+        return spec is not None and (kind is None or spec.kind == kind)
+
+    def get(self, name: str):
+        """Return the loaded model, loading it (and evicting others) if needed."""
+        spec = self._specs.get(name)
+        if spec is None:
+            raise KeyError(f'Unknown model: {name}')
+
+        obj = self._lookup(name)
+        if obj is not None:
+            return obj
+
+        with self._load_locks[name]:
+            # Another request may have finished loading while we waited
+            obj = self._lookup(name, count_hit=False)
+            if obj is not None:
+                return obj
+
+            with self._lock:
+                self.misses += 1
+                # Make room up front when we already know how big this model is
+                self._evict_until(self._known_sizes.get(name, 0))
+
+            started = time.perf_counter()
+            obj = spec.loader(spec.load_path())
+            resident = spec.sizer(obj)
+            elapsed = time.perf_counter() - started
+
+            with self._lock:
+                now = time.time()
+                self._loaded[name] = _Entry(obj, resident, now, now)
+                self._known_sizes[name] = resident
+                self.loads += 1
+                self._record('load', name, resident, seconds=round(elapsed, 3))
+                self._evict_until(0, keep=name)
+                if resident > self.budget_bytes:
+                    print(f'WARNING: Model {name} ({resident / 2**20:.0f} MB) alone exceeds the memory budget')
+            return obj
+
+    def evict(self, name: str) -> bool:
+        with self._lock:
+            entry = self._loaded.pop(name, None)
+            if entry is None:
+                return False
+            self.evictions += 1
+            self._record('evict', name, entry.resident_bytes)
+            return True
+
+    @property
+    def used_bytes(self) -> int:
+        with self._lock:
+            return sum(e.resident_bytes for e in self._loaded.values())
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'budget_mb': round(self.budget_bytes / 2**20, 1),
+                'used_mb': round(self.used_bytes / 2**20, 1),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hit_rate, 4),
+                'loads': self.loads,
+                'evictions': self.evictions,
+                'loaded': [
+                    {
+                        'name': name,
+                        'kind': self._specs[name].kind,
+                        'resident_mb': round(entry.resident_bytes / 2**20, 1),
+                        'last_used': entry.last_used,
+                    }
+                    for name, entry in reversed(self._loaded.items())
+                ],
+                'available': {name: spec.kind for name, spec in self._specs.items()},
+                'events': list(self.events),
+            }
+
+    def _lookup(self, name: str, count_hit: bool = True):
+        with self._lock:
+            entry = self._loaded.get(name)
+            if entry is None:
+                return None
+            self._loaded.move_to_end(name)
+            entry.last_used = time.time()
+            if count_hit:
+                self.hits += 1
+            return entry.obj
+
+    def _evict_until(self, incoming_bytes: int, keep: str = None):
+        """Drop least recently used models until `incoming_bytes` more would fit."""
+        for name in list(self._loaded):
+            if self.used_bytes + incoming_bytes <= self.budget_bytes:
+                break
+            if name != keep:
+                self.evict(name)
+
+    def _record(self, event: str, name: str, resident_bytes: int, **extra):
+        self.events.append({
+            'event': event,
+            'model': name,
+            'resident_mb': round(resident_bytes / 2**20, 1),
+            'time': time.time(),
+            **extra,
+        })
+        print(f'-- Model {event}: {name} ({resident_bytes / 2**20:.0f} MB) --')
+
+
+registry = ModelRegistry(
+    budget_bytes=int(float(os.getenv('MODEL_MEMORY_BUDGET_MB', DEFAULT_BUDGET_MB)) * 2**20)
+)
@@ -2,26 +2,61 @@ import spacy
 from collections import Counter
 from heapq import nlargest
 
-nlp = None
+from ml.registry import registry, ModelSpec
 
-def load_model():
-    global nlp
-    print('-- Loading Spacy Model (Static) --')
+DEFAULT_MODEL = 'en_core_web_sm'
+
+# name -> folder under ml/artifacts (the spaCy package name is used otherwise)
+STATIC_MODELS = {
+    'en_core_web_sm': 'en_core_web_sm',
+    'en_core_web_md': 'en_core_web_md',
+}
+
+
+def _load_spacy(load_path: str):
+    print(f'-- Loading Spacy Model (Static) from: {load_path} --')
+    nlp = spacy.load(load_path)
+    print('Spacy Model loaded')
+    return nlp
+
+
+def _resident_bytes(nlp) -> int:
+    # Serialized size of weights, vocab and vectors tracks the in-memory footprint closely
+    return len(nlp.to_bytes())
+
+
+for _name, _artifact_dir in STATIC_MODELS.items():
+    registry.register(ModelSpec(
+        name=_name,
+        kind='static',
+        source=_name,
+        artifact_dir=_artifact_dir,
+        loader=_load_spacy,
+        sizer=_resident_bytes,
+        marker='meta.json',
+    ))
+
+
+def load_model(model_name: str = None):
+    """Return the spaCy pipeline from the registry, or None if it is not installed."""
+    model_name = model_name or DEFAULT_MODEL
     try:
-        nlp = spacy.load('en_core_web_sm')
-        print('Spacy Model loaded')
+        return registry.get(model_name)
     except OSError:
-        print('WARNING: Spacy model not found.')
+        print(f'WARNING: Spacy model {model_name} not found.')
+        return None
+
+def predict(text: str, num_sentences: int, model_name: str = None) -> str:
+    return predict_many(text, [num_sentences], model_name)[0]
 
-def predict(text: str, num_sentences: int) -> str:
-    global nlp
+def predict_many(text: str, sentence_counts: list, model_name: str = None) -> list:
+    """Summaries for each of `sentence_counts`, parsing and scoring the text once."""
     if not text or not text.strip():
-        return "Text too short to summarize."
+        return ["Text too short to summarize."] * len(sentence_counts)
 
+    nlp = load_model(model_name)
     if not nlp:
-        load_model()
-        if not nlp:
-            return "Error: Static model not loaded."
+        return ["Error: Static model not loaded."] * len(sentence_counts)
 
     doc = nlp(text)
 
@@ -34,7 +69,7 @@ def predict(text: str, num_sentences: int) -> str:
     word_freq = Counter(keywords)
 
     if not word_freq:
-        return "Text too short to summarize."
+        return ["Text too short to summarize."] * len(sentence_counts)
 
     max_freq = max(word_freq.values())
 
@@ -48,7 +83,10 @@ def predict(text: str, num_sentences: int) -> str:
             if token.text.lower() in word_freq:
                 sent_score[sent] = sent_score.get(sent, 0) + word_freq[token.text.lower()]
 
-    top_sentences = nlargest(num_sentences, sent_score, key=sent_score.get)
-    top_sentences = sorted(top_sentences, key=lambda sent: sent.start)
+    summaries = []
+    for num_sentences in sentence_counts:
+        top_sentences = nlargest(num_sentences, sent_score, key=sent_score.get)
+        top_sentences = sorted(top_sentences, key=lambda sent: sent.start)
+        summaries.append(" ".join([sent.text for sent in top_sentences]))
 
-    return " ".join([sent.text for sent in top_sentences])
+    return summaries
@@ -0,0 +1,14 @@
+from fastapi import APIRouter , status
+from ml.registry import registry
+
+router = APIRouter(
+    prefix='/models',
+    tags=['Models']
+)
+
+@router.get('/' , status_code = status.HTTP_200_OK)
+def model_stats():
+    return {
+        'message' : 'Model registry stats fetched successfully',
+        'data' : registry.stats()
+    }
@@ -0,0 +1,48 @@
+from fastapi import APIRouter , HTTPException , status , Header , Depends , Query
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Optional
+from services.profiling import is_admin , profile_process , profile_store
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not is_admin(x_admin_token):
+        raise HTTPException(
+            status_code = status.HTTP_403_FORBIDDEN,
+            detail="Admin token required"
+        )
+
+router = APIRouter(
+    prefix='/admin/profiles',
+    tags=['Profiling'],
+    dependencies=[Depends(require_admin)]
+)
+
+@router.get('/' , status_code = status.HTTP_200_OK)
+def list_profiles():
+    return {
+        'message' : 'Profiles fetched successfully',
+        'data' : profile_store.list()
+    }
+
+@router.post('/process' , status_code = status.HTTP_200_OK)
+async def profile_whole_process(seconds: float = Query(10, gt=0, le=300)):
+    # Sample from a worker thread so the event loop keeps serving the traffic being profiled
+    meta = await run_in_threadpool(profile_process, seconds)
+    return {
+        'message' : 'Process profile captured',
+        'data' : meta
+    }
+
+@router.get('/{profile_id}' , status_code = status.HTTP_200_OK)
+def download_profile(profile_id: str):
+    found = profile_store.get(profile_id)
+    if not found:
+        raise HTTPException(
+           status_code = status.HTTP_404_NOT_FOUND,
+           detail="Profile not found"  
+        )
+    _, collapsed = found
+    return PlainTextResponse(
+        collapsed,
+        headers={'Content-Disposition': f'attachment; filename="{profile_id}.folded"'}
+    )
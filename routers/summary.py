@@ -1,10 +1,15 @@
-from fastapi import APIRouter , HTTPException , status,File , UploadFile , Form
-from services.user_services import get_user_history , save_summary_main
+from fastapi import APIRouter , HTTPException , status,File , UploadFile , Form , Header
+from services.user_services import get_user_history , save_summary_main , save_summary_variants
 from schemas.summary import SummaryModel , SummaryType
 from services.pdf_preprocessing import process_pdf
-from ml.static_model import predict as predict_static
-from ml.deep_model import predict as predict_deep
+from ml.static_model import predict as predict_static , predict_many as predict_static_many
+from ml.deep_model import predict as predict_deep , predict_many as predict_deep_many
 from services.s3 import upload_file_to_s3
+from ml.registry import registry
+from typing import Optional , List
+from starlette.concurrency import run_in_threadpool
+from services.profiling import is_admin , profile_request
+from contextlib import nullcontext
 router = APIRouter(
     prefix='/summary',
     tags=['Summary']
@@ -23,14 +28,14 @@ async def user_history(user_id):
         'data' : response
     }
 
-@router.post('/save-summary')
-async def save_summary(
-    user_id: int = Form(...),
-    summary_type: SummaryType = Form(...),
-    max_length : int = Form(...),
-    file: UploadFile = File(...)
-):
-    filename = file.filename
+async def _read_pdf(file: UploadFile, summary_type: SummaryType, model_name: Optional[str]) -> bytes:
+    """Checks shared by both save routes; returns the uploaded PDF bytes."""
+    if model_name and not registry.is_registered(model_name, kind=summary_type.value):
+        raise HTTPException(
+            status_code = status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {summary_type.value} model: {model_name}"
+        )
+
     if file.content_type != 'application/pdf':
         raise HTTPException(
             status_code = status.HTTP_400_BAD_REQUEST,
@@ -43,29 +48,126 @@ async def save_summary(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid PDF file"
         )
-    
-    text = process_pdf(file_bytes)
-    if summary_type == SummaryType.static: 
-        summary = predict_static(text,max_length)
-    else : summary = predict_deep(text,max_length)
+    return file_bytes
+
+def _summarize_and_store(
+    file_bytes : bytes,
+    filename : str,
+    content_type : str,
+    user_id : int,
+    summary_type : SummaryType,
+    max_lengths : List[int],
+    model_name : Optional[str],
+    wait_for_commit : bool,
+    profile_tags : Optional[dict] = None
+):
+    """Parse -> summarize -> upload -> save. Blocking, so routes run it in the threadpool.
+
+    With `profile_tags`, the whole pipeline is sampled on the worker thread that
+    runs it, and `profile_tags['profile_id']` holds the stored profile afterwards.
+    """
+    profiling = profile_request(profile_tags) if profile_tags is not None else nullcontext({})
+    with profiling as tags:
+        text = process_pdf(file_bytes)
+        tags['text_chars'] = len(text)
+
+        if len(max_lengths) == 1:
+            if summary_type == SummaryType.static: 
+                summaries = [predict_static(text,max_lengths[0],model_name)]
+            else : summaries = [predict_deep(text,max_lengths[0],model_name)]
+        # One parse / encoder pass shared by every requested length
+        elif summary_type == SummaryType.static: 
+            summaries = predict_static_many(text,max_lengths,model_name)
+        else : summaries = predict_deep_many(text,max_lengths,model_name)
+
+        s3_url = upload_file_to_s3(file_bytes , filename , content_type)
+
+        if len(max_lengths) == 1:
+            return save_summary_main(
+                user_id=user_id,
+                filename=filename,
+                summary=summaries[0],
+                s3_url=s3_url,
+                summary_type=summary_type,
+                summary_length = max_lengths[0],
+                wait_for_commit = wait_for_commit
+            )
+        return save_summary_variants(
+            user_id=user_id,
+            filename=filename,
+            summaries=summaries,
+            s3_url=s3_url,
+            summary_type=summary_type,
+            summary_lengths = max_lengths,
+            wait_for_commit = wait_for_commit
+        )
+
+@router.post('/save-summary')
+async def save_summary(
+    user_id: int = Form(...),
+    summary_type: SummaryType = Form(...),
+    max_length : int = Form(...),
+    file: UploadFile = File(...),
+    model_name : Optional[str] = Form(None),
+    wait_for_commit : bool = Form(True),
+    x_profile : bool = Header(False),
+    x_admin_token : Optional[str] = Header(None)
+):
+    filename = file.filename
+    if x_profile and not is_admin(x_admin_token):
+        raise HTTPException(
+            status_code = status.HTTP_403_FORBIDDEN,
+            detail="Profiling requires a valid admin token"
+        )
 
-    s3_url = upload_file_to_s3(file_bytes , filename , file.content_type)
+    file_bytes = await _read_pdf(file, summary_type, model_name)
     
-    db_data = save_summary_main(
-        user_id=user_id,
-        filename=filename,
-        summary=summary,
-        s3_url=s3_url,
-        summary_type=summary_type,
-        summary_length = max_length
+    # Only sample when asked to, so normal requests pay nothing
+    profile_tags = {
+        'route': '/summary/save-summary',
+        'filename': filename,
+        'document_bytes': len(file_bytes),
+        'summary_type': summary_type.value,
+        'max_length': max_length,
+        'model_name': model_name
+    } if x_profile else None
+
+    db_data = await run_in_threadpool(
+        _summarize_and_store,
+        file_bytes, filename, file.content_type,
+        user_id, summary_type, [max_length], model_name,
+        wait_for_commit, profile_tags
     )
 
-    return {
+    response = {
         "message": "Summary saved successfully",
         "data": db_data
     }
+    if profile_tags:
+        response['profile_id'] = profile_tags['profile_id']
+    return response
 
 
 
-    
+@router.post('/save-summaries')
+async def save_summaries(
+    user_id: int = Form(...),
+    summary_type: SummaryType = Form(...),
+    max_lengths : List[int] = Form(...),
+    file: UploadFile = File(...),
+    model_name : Optional[str] = Form(None),
+    wait_for_commit : bool = Form(True)
+):
+    file_bytes = await _read_pdf(file, summary_type, model_name)
 
+    db_data = await run_in_threadpool(
+        _summarize_and_store,
+        file_bytes, file.filename, file.content_type,
+        user_id, summary_type, max_lengths, model_name,
+        wait_for_commit
+    )
+
+    return {
+        "message": "Summaries saved successfully",
+        "data": db_data
+    }
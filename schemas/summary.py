@@ -1,6 +1,7 @@
 from pydantic import BaseModel , Field , EmailStr
 from datetime import datetime 
 from enum import Enum
+from typing import Optional
 
 class SummaryType(str , Enum):
     static = 'static'
@@ -12,4 +13,5 @@ class SummaryModel(BaseModel):
     summary_type : SummaryType = Field(...)
     filename: str = Field(... , min_length=3)
     max_length : int = Field(...)
+    model_name : Optional[str] = Field(None)
     
@@ -0,0 +1,171 @@
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+DEFAULT_INTERVAL = 0.005
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace('\\', '/').rsplit('/', 2)
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class StackSampler:
+    """Statistical profiler: snapshots thread stacks every `interval` seconds.
+
+    Samples one thread (`thread_id`) or every thread but its own, and counts
+    identical stacks, which is exactly the collapsed format flame graph tools
+    read. Nothing is hooked into the interpreter, so only the sampled threads
+    pay for it and only while the sampler is running.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL, thread_id: int = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self.started_at = None
+        self.duration = 0.0
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.time() - self.started_at
+        return self.stacks
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            if self.thread_id is not None:
+                frame = frames.get(self.thread_id)
+                if frame is None:
+                    continue
+                self.stacks[_collapse(frame)] += 1
+            else:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for ident, frame in frames.items():
+                    if ident == own_id:
+                        continue
+                    self.stacks[f'thread:{names.get(ident, ident)};{_collapse(frame)}'] += 1
+            self.samples += 1
+
+
+def to_collapsed(stacks: Counter) -> str:
+    """Brendan Gregg's folded format: one 'frame;frame;frame count' line per stack."""
+    return ''.join(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+
+class ProfileStore:
+    """Keeps the most recent profiles in memory, and on disk when `directory` is set."""
+
+    def __init__(self, max_profiles: int = 50, directory: str = None):
+        self.max_profiles = max_profiles
+        self.directory = directory
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, sampler: StackSampler, kind: str, tags: dict) -> dict:
+        meta = {
+            'id': uuid.uuid4().hex,
+            'kind': kind,
+            'started_at': sampler.started_at,
+            'duration_s': round(sampler.duration, 3),
+            'samples': sampler.samples,
+            'interval_ms': sampler.interval * 1000,
+            'tags': tags,
+        }
+        collapsed = to_collapsed(sampler.stacks)
+        with self._lock:
+            self._profiles[meta['id']] = (meta, collapsed)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(self.directory, meta['id'])
+            with open(base + '.folded', 'w', encoding='utf-8') as f:
+                f.write(collapsed)
+            with open(base + '.json', 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        return meta
+
+    def list(self) -> list:
+        with self._lock:
+            return [meta for meta, _ in reversed(self._profiles.values())]
+
+    def get(self, profile_id: str):
+        """Return (meta, collapsed text) or None."""
+        with self._lock:
+            found = self._profiles.get(profile_id)
+        if found or not self.directory:
+            return found
+
+        base = os.path.join(self.directory, os.path.basename(profile_id))
+        if not os.path.exists(base + '.folded'):
+            return None
+        with open(base + '.json', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(base + '.folded', encoding='utf-8') as f:
+            return meta, f.read()
+
+
+def is_admin(token: str) -> bool:
+    """Profiling is off unless PROFILING_ADMIN_TOKEN is set and the caller presents it."""
+    expected = os.getenv('PROFILING_ADMIN_TOKEN')
+    return bool(expected and token) and hmac.compare_digest(token.encode(), expected.encode())
+
+
+@contextmanager
+def profile_request(tags: dict):
+    """Sample the calling thread for the duration of the block and store the profile.
+
+    Enter it on the thread that does the work: an `async` route awaiting the
+    threadpool would only sample the idle event loop.
+
+    Yields the tag dict, so the caller can add tags (e.g. extracted text size)
+    as it learns them, and afterwards a `profile_id` key holds the stored id.
+    """
+    sampler = StackSampler(thread_id=threading.get_ident()).start()
+    try:
+        yield tags
+    finally:
+        sampler.stop()
+        tags['profile_id'] = profile_store.save(sampler, 'request', dict(tags))['id']
+
+
+def profile_process(seconds: float, interval: float = DEFAULT_INTERVAL) -> dict:
+    """Sample every thread in the process for `seconds` (blocking) and store the profile."""
+    sampler = StackSampler(interval=interval).start()
+    time.sleep(seconds)
+    sampler.stop()
+    return profile_store.save(sampler, 'process', {'seconds': seconds})
+
+
+profile_store = ProfileStore(
+    max_profiles=int(os.getenv('PROFILE_MAX_STORED', 50)),
+    directory=os.getenv('PROFILE_DIR'),
+)
@@ -0,0 +1,353 @@
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+
+import database.supabase as db
+from postgrest.exceptions import APIError
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process spool locking
+    fcntl = None
+
+# HTTP statuses that say "try again later" rather than "this row is bad"
+_TRANSIENT_CLIENT_STATUSES = {401, 403, 408, 429}
+
+
+def is_rejection(error: APIError) -> bool:
+    """True when the database refused the rows themselves (bad data), not when it was unreachable."""
+    code = str(error.code or '')
+    if code.isdigit() and len(code) == 3:
+        status = int(code)
+        return 400 <= status < 500 and status not in _TRANSIENT_CLIENT_STATUSES
+    if code.startswith(('PGRST1', 'PGRST2')):
+        return True
+    return len(code) == 5 and code[:2] in ('22', '23')
+
+
+@dataclass
+class _PendingRow:
+    spool_id: str
+    row: dict
+    urgent: bool = False
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class SummaryWriter:
+    """Write-behind buffer: spools summary rows locally and inserts them into Supabase in batches."""
+
+    def __init__(
+        self,
+        table: str = 'summaries',
+        batch_size: int = 50,
+        flush_interval: float = 0.2,
+        spool_path: str = 'summary_spool.jsonl',
+        fsync: bool = True,
+        max_backoff: float = 30.0,
+        rejected_retries: int = 3,
+        compact_after: int = 1000,
+    ):
+        self.table = table
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = spool_path
+        self.fsync = fsync
+        self.max_backoff = max_backoff
+        self.rejected_retries = rejected_retries
+        self.compact_after = compact_after
+
+        self._pending = deque()
+        self._urgent = 0
+        self._cond = threading.Condition()
+        self._spool_lock = threading.Lock()
+        self._spool = None
+        # Spooled but not yet acked rows, so the spool can be rewritten without re-reading it
+        self._outstanding = {}
+        self._acks = 0
+        self._thread = None
+        self._closing = False
+        self._in_flight = 0
+        self.committed = 0
+        self.batches = 0
+        self.dead = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._closing = False
+        with self._cond:
+            # Rows left over from a close() that timed out are still in our spool
+            self._pending.clear()
+            self._urgent = 0
+        self._spool = open(self._own_spool_path(), 'a+', encoding='utf-8')
+        self._lock_file(self._spool, blocking=True)
+        replayed = self._replay_spool()
+        self._thread = threading.Thread(target=self._run, name='summary-writer', daemon=True)
+        self._thread.start()
+        print(f'-- Summary writer started ({replayed} spooled rows replayed) --')
+        return self
+
+    def submit(self, row: dict, urgent: bool = False) -> Future:
+        """Queue a row for insertion; the returned future resolves to the committed row.
+
+        Pass `urgent=True` when the caller is about to wait on the future so the
+        row is flushed without waiting for the batch to fill.
+        """
+        if not self.running:
+            raise RuntimeError('Summary writer is not running')
+
+        spool_id = uuid.uuid4().hex
+        self._spool_write({'op': 'add', 'id': spool_id, 'row': row})
+        item = _PendingRow(spool_id, row, urgent)
+        with self._cond:
+            self._pending.append(item)
+            self._urgent += urgent
+            # Wake the flusher so it can arm the flush timer or write the batch
+            if urgent or len(self._pending) == 1 or len(self._pending) >= self.batch_size:
+                self._cond.notify()
+        return item.future
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until everything queued so far is committed or dead-lettered."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify()
+            while self._pending or self._in_flight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float = 30.0):
+        """Flush outstanding rows and stop the background thread."""
+        if not self.running:
+            return
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._thread.join()
+        self._thread = None
+        with self._spool_lock:
+            if flushed:
+                # Empty before unlinking so a process that adopts the file meanwhile finds nothing
+                self._spool.truncate(0)
+                os.remove(self._own_spool_path())
+            self._spool.close()
+            self._spool = None
+        if not flushed:
+            print(f'WARNING: Summary writer closed with {len(self._pending)} rows left in {self._own_spool_path()}')
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self._cond:
+                while not self._closing and not self._batch_ready():
+                    self._cond.wait(self._time_to_deadline())
+                if self._closing:
+                    return
+                batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                self._urgent -= sum(item.urgent for item in batch)
+                self._in_flight = len(batch)
+
+            try:
+                self._write_batch(batch)
+                backoff = 0.0
+            except Exception as e:
+                # Transient failure (network, timeout): put unfinished rows back in order and back off
+                remaining = [item for item in batch if not item.future.done()]
+                backoff = min(self.max_backoff, max(self.flush_interval, backoff * 2))
+                print(f'WARNING: Summary batch of {len(remaining)} failed, retrying in {backoff:.1f}s: {e}')
+                with self._cond:
+                    self._pending.extendleft(reversed(remaining))
+                    self._urgent += sum(item.urgent for item in remaining)
+                time.sleep(backoff)
+            finally:
+                with self._cond:
+                    self._in_flight = 0
+                    self._cond.notify_all()
+
+    def _batch_ready(self) -> bool:
+        if not self._pending:
+            return False
+        if self._urgent or len(self._pending) >= self.batch_size:
+            return True
+        return time.monotonic() - self._pending[0].enqueued_at >= self.flush_interval
+
+    def _time_to_deadline(self):
+        if not self._pending:
+            return None
+        return max(0.0, self._pending[0].enqueued_at + self.flush_interval - time.monotonic())
+
+    def _write_batch(self, batch: list):
+        """Insert a batch; transient errors propagate to `_run`, which backs off and retries."""
+        rows = [item.row for item in batch]
+        attempts = max(1, self.rejected_retries)
+        for attempt in range(attempts):
+            try:
+                response = db.supabase.table(self.table).insert(rows).execute()
+                self._commit(batch, response.data)
+                return
+            except APIError as e:
+                if not is_rejection(e):
+                    raise
+                last_error = e
+                if attempt + 1 < attempts:
+                    time.sleep(self.flush_interval * 2 ** attempt)
+
+        # The database keeps rejecting the batch: isolate the offending rows
+        print(f'WARNING: Summary batch rejected ({last_error.message}), retrying row by row')
+        for item in batch:
+            try:
+                response = db.supabase.table(self.table).insert(item.row).execute()
+                self._commit([item], response.data)
+            except APIError as e:
+                if not is_rejection(e):
+                    raise
+                self._dead_letter(item, e)
+                item.future.set_exception(Exception(e.message))
+
+    def _commit(self, batch: list, stored_rows: list):
+        self._spool_write({'op': 'ack', 'ids': [item.spool_id for item in batch]})
+        self.batches += 1
+        self.committed += len(batch)
+        stored_rows = stored_rows or []
+        for i, item in enumerate(batch):
+            if not item.future.done():
+                item.future.set_result(stored_rows[i] if i < len(stored_rows) else item.row)
+
+    def _dead_letter(self, item: _PendingRow, error: APIError):
+        with open(self.spool_path + '.dead', 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'id': item.spool_id, 'row': item.row, 'error': error.message}) + '\n')
+        self._spool_write({'op': 'ack', 'ids': [item.spool_id]})
+        self.dead += 1
+
+    def _spool_write(self, record: dict):
+        line = json.dumps(record) + '\n'
+        with self._spool_lock:
+            if record['op'] == 'add':
+                self._outstanding[record['id']] = record['row']
+            else:
+                for spool_id in record['ids']:
+                    self._outstanding.pop(spool_id, None)
+                self._acks += 1
+                # Keep the spool bounded: drop acked history once idle or once it piles up
+                if not self._outstanding or self._acks >= self.compact_after:
+                    self._compact_spool()
+                    return
+            self._spool.write(line)
+            self._spool.flush()
+            if self.fsync:
+                os.fsync(self._spool.fileno())
+
+    def _compact_spool(self):
+        # Called with _spool_lock held. Write the outstanding rows to a new locked
+        # file and swap it in, so a crash mid-compaction leaves one complete spool.
+        own_path = self._own_spool_path()
+        tmp_path = own_path + '.compact'
+        compacted = open(tmp_path, 'w+', encoding='utf-8')
+        self._lock_file(compacted, blocking=True)
+        for spool_id, row in self._outstanding.items():
+            compacted.write(json.dumps({'op': 'add', 'id': spool_id, 'row': row}) + '\n')
+        compacted.flush()
+        if self.fsync:
+            os.fsync(compacted.fileno())
+        os.replace(tmp_path, own_path)
+        # Empty the old file before releasing its lock so nobody adopts its rows
+        self._spool.truncate(0)
+        self._spool.close()
+        self._spool = compacted
+        self._acks = 0
+
+    def _own_spool_path(self) -> str:
+        return f'{self.spool_path}.{os.getpid()}'
+
+    @staticmethod
+    def _lock_file(f, blocking: bool = False) -> bool:
+        if fcntl is None:
+            return True
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            return True
+        except BlockingIOError:
+            return False
+
+    @staticmethod
+    def _same_file(f, path: str) -> bool:
+        try:
+            return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _unacked(lines) -> dict:
+        unacked = {}
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash mid-write can leave a torn last line
+                continue
+            if record['op'] == 'add':
+                unacked[record['id']] = record['row']
+            else:
+                for spool_id in record['ids']:
+                    unacked.pop(spool_id, None)
+        return unacked
+
+    def _replay_spool(self) -> int:
+        """Queue unacked rows from our spool and from spools of workers that are gone."""
+        own_path = self._own_spool_path()
+        self._spool.seek(0)
+        unacked = self._unacked(self._spool)
+
+        orphans = []
+        for path in glob.glob(glob.escape(self.spool_path) + '.*'):
+            if path == own_path or not path.rsplit('.', 1)[-1].isdigit():
+                continue
+            try:
+                orphan = open(path, 'r+', encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            # Skip files held by a live worker, and names that were compacted over meanwhile
+            if not self._lock_file(orphan) or not self._same_file(orphan, path):
+                orphan.close()
+                continue
+            unacked.update(self._unacked(orphan))
+            orphans.append((path, orphan))
+
+        # Rewrite our spool with only what is still outstanding
+        with self._spool_lock:
+            self._outstanding = dict(unacked)
+            self._compact_spool()
+
+        # Only drop the orphans once their rows are durable in our spool
+        for path, orphan in orphans:
+            with orphan:
+                orphan.truncate(0)
+                os.remove(path)
+
+        with self._cond:
+            for spool_id, row in unacked.items():
+                self._pending.append(_PendingRow(spool_id, row))
+        return len(unacked)
+
+
+summary_writer = SummaryWriter(
+    batch_size=int(os.getenv('SUMMARY_BATCH_SIZE', 50)),
+    flush_interval=float(os.getenv('SUMMARY_FLUSH_INTERVAL_MS', 200)) / 1000,
+    spool_path=os.getenv('SUMMARY_SPOOL_PATH', 'summary_spool.jsonl'),
+    fsync=os.getenv('SUMMARY_SPOOL_FSYNC', '1') != '0',
+)
@@ -2,6 +2,11 @@ from database.supabase import supabase
 from core.security import hash_password , verify_password
 from schemas.user import UserSignUpModel , UserLoginModel
 from postgrest.exceptions import APIError
+from services.summary_writer import summary_writer
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+COMMIT_TIMEOUT = 30
+
 def create_user(user:UserSignUpModel):
     try:
         data = {
@@ -39,22 +44,38 @@ def user_login(user: UserLoginModel):
     except APIError as e:
         raise Exception(e.message)
     
-def save_summary_main(user_id:int ,filename : str ,  summary : str , s3_url : str , summary_type : str , summary_length : int):
+def save_summary_variants(user_id:int ,filename : str , summaries : list , s3_url : str , summary_type : str , summary_lengths : list , wait_for_commit : bool = True):
     try:
-        data = {
-            "user_id": user_id,
-            "filename": filename,
-            "summary": summary,
-            "summary_type": summary_type,
-            "summary_length" : summary_length,
-            "s3_url": s3_url 
-        }
-        response = supabase.table('summaries').insert(data).execute()
+        rows = [
+            {
+                "user_id": user_id,
+                "filename": filename,
+                "summary": summary,
+                "summary_type": summary_type,
+                "summary_length" : summary_length,
+                "s3_url": s3_url 
+            }
+            for summary, summary_length in zip(summaries, summary_lengths)
+        ]
+        if summary_writer.running:
+            # Queue every variant before waiting so they can share one batched insert
+            futures = [summary_writer.submit(row, urgent=wait_for_commit) for row in rows]
+            if not wait_for_commit:
+                return rows
+            try:
+                return [future.result(timeout=COMMIT_TIMEOUT) for future in futures]
+            except FutureTimeoutError:
+                raise Exception("Summaries queued but not committed yet")
+
+        response = supabase.table('summaries').insert(rows).execute()
         return response.data
     
     except APIError as e:
         raise Exception(e.message)
     
+def save_summary_main(user_id:int ,filename : str ,  summary : str , s3_url : str , summary_type : str , summary_length : int , wait_for_commit : bool = True):
+    return save_summary_variants(user_id, filename, [summary], s3_url, summary_type, [summary_length], wait_for_commit)[0:1]
+    
 def get_user_history(user_id : int):
     try:
         response = (
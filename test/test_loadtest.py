@@ -0,0 +1,76 @@
+import random
+import pytest
+from unittest.mock import patch
+from postgrest.exceptions import APIError
+
+from loadtest.fake_postgrest import FakePostgREST
+from loadtest.runner import StageResult, Sample, percentile, parse_mix, find_saturation, format_report, is_saturated
+from services.user_services import save_summary_main, get_user_history
+
+# --- FAKE POSTGREST ---
+def test_fake_postgrest_round_trip():
+    """The real supabase client should be able to insert and read back through the fake."""
+    with FakePostgREST() as postgrest:
+        with patch("services.user_services.supabase", postgrest.client()):
+            saved = save_summary_main(1, "doc.pdf", "Short summary", "http://s3...", "static", 3)
+            save_summary_main(2, "other.pdf", "Other", "http://s3...", "static", 3)
+            history = get_user_history(1)
+
+    assert saved[0]["id"] == 1
+    assert len(history) == 1
+    assert history[0]["filename"] == "doc.pdf"
+
+def test_fake_postgrest_single_no_rows():
+    with FakePostgREST() as postgrest:
+        client = postgrest.client()
+        with pytest.raises(APIError) as exc:
+            client.table("users").select("*").eq("email", "nobody@test.com").single().execute()
+    assert exc.value.code == "PGRST116"
+
+# --- REPORTING ---
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+
+def test_parse_mix_rejects_unknown_route():
+    assert parse_mix("login=1,user-history=3") == {"login": 1.0, "user-history": 3.0}
+    with pytest.raises(ValueError):
+        parse_mix("signup=1")
+
+def test_find_saturation():
+    def stage(rate, ok, latency):
+        samples = [Sample("login", latency, 200, latency + i / rate) for i in range(ok)]
+        return StageResult(offered_rps=rate, duration=1.0, elapsed=1.0, arrivals=rate, samples=samples)
+
+    stages = [stage(10, 10, 0.05), stage(20, 20, 0.08), stage(40, 25, 0.9)]
+    assert find_saturation(stages, p99_slo=0.5) == (20, 40)
+
+def test_slow_poisson_stage_not_saturated():
+    """A Poisson schedule that happens to send fewer than rate * duration requests is not saturation."""
+    def arrivals(seed, rate=5, duration=20.0):
+        rng, offset, offsets = random.Random(seed), 0.0, []
+        while True:
+            offset += rng.expovariate(rate)
+            if offset >= duration:
+                return offsets
+            offsets.append(offset)
+
+    offsets = next(o for o in map(arrivals, range(1000)) if len(o) < 90)
+    samples = [Sample("login", 0.01, 200, offset + 0.01) for offset in offsets]
+    stage = StageResult(offered_rps=5, duration=20.0, elapsed=20.0, arrivals=len(offsets), samples=samples)
+
+    assert stage.achieved_rps < 5 * 0.9
+    assert not is_saturated(stage, p99_slo=1.0)
+
+def test_achieved_rps_ignores_drain():
+    """A long but steady latency is reported as drain time, not lost throughput."""
+    samples = [Sample("login", 1.5, 200, 1.5 + i / 5) for i in range(15)]
+    stage = StageResult(offered_rps=5, duration=3.0, elapsed=4.5, samples=samples)
+
+    assert stage.achieved_rps == pytest.approx(5)
+    assert stage.drain == pytest.approx(1.5)
+
+def test_format_report_without_stages():
+    assert format_report([], p99_slo=1.0) == "No stages ran."
@@ -1,7 +1,8 @@
 import pytest
 from unittest.mock import patch, MagicMock
-from ml.static_model import predict as predict_static
-from ml.deep_model import predict as predict_deep
+from ml.static_model import predict as predict_static, predict_many as predict_static_many
+from ml.deep_model import predict as predict_deep, predict_many as predict_deep_many
+from ml.registry import ModelRegistry, ModelSpec
 
 # --- Static Model Tests (spaCy) ---
 
@@ -23,21 +24,37 @@ def test_static_predict_too_short():
     result = predict_static("   ", 1)
     assert result == "Text too short to summarize."
 
+def test_static_predict_many_success():
+    """Each requested sentence count gets its own summary from one parse."""
+    text = (
+        "FastAPI is a modern web framework. It is very fast and easy to use. "
+        "Python developers love FastAPI for its speed and type safety."
+    )
+    short, long = predict_static_many(text, [1, 2])
+
+    assert "FastAPI" in short
+    assert len(long) > len(short)
+
+def test_static_predict_many_too_short():
+    assert predict_static_many("   ", [1, 3]) == ["Text too short to summarize."] * 2
+
 # --- Deep Model Tests (Transformers) ---
 
 def test_deep_predict_lazy_loading():
-    """Verify the deep model attempts to load if globals are None."""
-    with patch("ml.deep_model.load") as mock_load:
+    """Verify the deep model is fetched from the registry on demand."""
+    with patch("ml.deep_model.registry") as mock_registry:
         # We don't actually want to run the heavy model here, 
-        # just check if it tries to load when model is None
-        with patch("ml.deep_model.model", None):
-            predict_deep("Some text", 50)
-            mock_load.assert_called_once()
-
-@patch("ml.deep_model.tokenizer")
-@patch("ml.deep_model.model")
-def test_deep_predict_mocked(mock_model, mock_tokenizer):
+        # just check that predict asks the registry for the default model
+        mock_registry.get.side_effect = OSError("not downloaded")
+        result = predict_deep("Some text", 50)
+        mock_registry.get.assert_called_once_with("distilbart-cnn-12-6")
+        assert result == "Error: Deep Model failed to load."
+
+@patch("ml.deep_model.registry")
+def test_deep_predict_mocked(mock_registry):
     """Test the processing logic of predict_deep without loading the 500MB model."""
+    mock_tokenizer, mock_model = MagicMock(), MagicMock()
+    mock_registry.get.return_value = (mock_tokenizer, mock_model)
     
     # 1. Setup mock tokenizer return using MagicMock
     mock_inputs = MagicMock()
@@ -56,4 +73,79 @@ def test_deep_predict_mocked(mock_model, mock_tokenizer):
     result = predict_deep("This is a long input text that needs to be summarized.", 50)
     
     assert result == "This is a mocked summary."
-    mock_model.generate.assert_called_once()
\ No newline at end of file
+    mock_model.generate.assert_called_once()
+
+@patch("ml.deep_model.registry")
+def test_deep_predict_many_reuses_encoder(mock_registry):
+    """The encoder runs once and the decoder once per requested length."""
+    mock_tokenizer, mock_model = MagicMock(), MagicMock()
+    mock_registry.get.return_value = (mock_tokenizer, mock_model)
+    mock_tokenizer.model_max_length = 1024
+    mock_tokenizer.return_value.to.return_value = {"input_ids": "fake_tensor", "attention_mask": "fake_mask"}
+    mock_model.generate.return_value = ["fake_summary_ids"]
+    mock_tokenizer.decode.side_effect = ["short summary", "long summary"]
+
+    result = predict_deep_many("This is a long input text that needs to be summarized.", [40, 120])
+
+    assert result == ["short summary", "long summary"]
+    mock_model.get_encoder.return_value.assert_called_once()
+    encoder_outputs = mock_model.get_encoder.return_value.return_value
+    assert mock_model.generate.call_count == 2
+    for call, max_length in zip(mock_model.generate.call_args_list, [40, 120]):
+        assert call.kwargs["encoder_outputs"] is encoder_outputs
+        assert call.kwargs["max_length"] == max_length
+        assert "input_ids" not in call.kwargs
+
+# --- Model Registry Tests ---
+
+def make_registry(budget_bytes, sizes):
+    """Registry whose loaders just return the model name and report a fixed size."""
+    loaded = []
+    def loader(load_path):
+        loaded.append(load_path)
+        return load_path
+    reg = ModelRegistry(budget_bytes=budget_bytes)
+    for name, size in sizes.items():
+        reg.register(ModelSpec(
+            name=name, kind="deep", source=name, artifact_dir=f"missing_{name}",
+            loader=loader, sizer=lambda obj, size=size: size, marker="config.json",
+        ))
+    return reg, loaded
+
+def test_registry_loads_on_demand_and_counts_hits():
+    reg, loaded = make_registry(100, {"a": 10})
+    assert reg.get("a") == "a"
+    assert reg.get("a") == "a"
+    assert loaded == ["a"]
+    assert reg.hits == 1 and reg.misses == 1
+    assert reg.hit_rate == 0.5
+
+def test_registry_evicts_least_recently_used():
+    reg, loaded = make_registry(100, {"a": 40, "b": 40, "c": 40})
+    reg.get("a")
+    reg.get("b")
+    reg.get("a")          # b is now least recently used
+    reg.get("c")
+
+    stats = reg.stats()
+    assert [m["name"] for m in stats["loaded"]] == ["c", "a"]
+    assert reg.evictions == 1
+    assert reg.used_bytes == 80
+    assert [e["event"] for e in stats["events"]] == ["load", "load", "load", "evict"]
+
+def test_registry_unknown_model():
+    reg, _ = make_registry(100, {"a": 10})
+    with pytest.raises(KeyError):
+        reg.get("nope")
+
+def test_model_spec_load_path_needs_marker(tmp_path):
+    spec = ModelSpec(
+        name="a", kind="deep", source="hub/model", artifact_dir="model",
+        loader=None, sizer=None, marker="config.json",
+    )
+    with patch("ml.registry.ARTIFACTS_DIR", str(tmp_path)):
+        (tmp_path / "model").mkdir()
+        assert spec.load_path() == "hub/model"
+
+        (tmp_path / "model" / "config.json").write_text("{}")
+        assert spec.load_path() == str(tmp_path / "model")
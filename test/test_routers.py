@@ -3,6 +3,7 @@ from fastapi.testclient import TestClient
 from unittest.mock import patch
 from main import app  # Ensure this points to your FastAPI app instance
 import io
+import time
 
 client = TestClient(app)
 
@@ -82,6 +83,28 @@ def test_save_summary_success(mock_save_db, mock_s3, mock_predict, mock_process)
     mock_process.assert_called_once()
     mock_predict.assert_called_once()
 
+### --- MULTI-LENGTH SUMMARIES ---
+@patch("routers.summary.process_pdf")
+@patch("routers.summary.predict_deep_many")
+@patch("routers.summary.upload_file_to_s3")
+@patch("routers.summary.save_summary_variants")
+def test_save_summaries_success(mock_save_db, mock_s3, mock_predict_many, mock_process):
+    mock_process.return_value = "Extracted text from PDF"
+    mock_predict_many.return_value = ["Short summary", "Longer summary"]
+    mock_s3.return_value = "https://s3-url.com/test.pdf"
+    mock_save_db.return_value = [{"id": 10}, {"id": 11}]
+
+    file_tuple = ("test.pdf", io.BytesIO(b"%PDF-1.4 simulated content"), "application/pdf")
+    data = {"user_id": "1", "summary_type": "deep", "max_lengths": ["60", "150"]}
+
+    response = client.post("/summary/save-summaries", data=data, files={"file": file_tuple})
+
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()["data"]] == [10, 11]
+    mock_predict_many.assert_called_once_with("Extracted text from PDF", [60, 150], None)
+    assert mock_save_db.call_args.kwargs["summaries"] == ["Short summary", "Longer summary"]
+    assert mock_save_db.call_args.kwargs["summary_lengths"] == [60, 150]
+
 ### --- INVALID FILE TYPE ---
 def test_save_summary_invalid_type():
     # Use .txt to trigger the 400 error logic in your router
@@ -91,4 +114,97 @@ def test_save_summary_invalid_type():
     response = client.post("/summary/save-summary", data=data, files={"file": file_tuple})
     
     assert response.status_code == 400
-    assert "Only PDF files are allowed" in response.json()["detail"]
\ No newline at end of file
+    assert "Only PDF files are allowed" in response.json()["detail"]
+
+### --- UNKNOWN MODEL ---
+def test_save_summary_unknown_model():
+    file_tuple = ("test.pdf", io.BytesIO(b"%PDF-1.4 simulated content"), "application/pdf")
+    data = {"user_id": "1", "summary_type": "static", "max_length": "5", "model_name": "distilbart-cnn-12-6"}
+
+    response = client.post("/summary/save-summary", data=data, files={"file": file_tuple})
+
+    assert response.status_code == 400
+    assert "Unknown static model" in response.json()["detail"]
+
+def test_save_summaries_rejects_fake_pdf():
+    file_tuple = ("test.pdf", io.BytesIO(b"not really a pdf"), "application/pdf")
+    data = {"user_id": "1", "summary_type": "deep", "max_lengths": ["60", "150"]}
+
+    response = client.post("/summary/save-summaries", data=data, files={"file": file_tuple})
+
+    assert response.status_code == 400
+    assert "Invalid PDF file" in response.json()["detail"]
+
+### --- MODEL REGISTRY STATS ---
+def test_model_stats_endpoint():
+    response = client.get("/models/")
+
+    assert response.status_code == 200
+    assert "distilbart-cnn-12-6" in response.json()["data"]["available"]
+
+
+### --- PROFILING ---
+def test_profiling_requires_admin_token(monkeypatch):
+    monkeypatch.setenv("PROFILING_ADMIN_TOKEN", "secret")
+    file_tuple = ("test.pdf", io.BytesIO(b"%PDF-1.4 simulated content"), "application/pdf")
+    data = {"user_id": "1", "summary_type": "static", "max_length": "5"}
+
+    response = client.post("/summary/save-summary", data=data, files={"file": file_tuple},
+                           headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+
+    assert client.get("/admin/profiles/").status_code == 403
+
+def test_profiling_rejects_non_ascii_token(monkeypatch):
+    monkeypatch.setenv("PROFILING_ADMIN_TOKEN", "secret")
+    response = client.get("/admin/profiles/", headers={"X-Admin-Token": "s\xe9cret".encode("latin-1")})
+    assert response.status_code == 403
+
+@patch("routers.summary.process_pdf")
+@patch("routers.summary.predict_static")
+@patch("routers.summary.upload_file_to_s3")
+@patch("routers.summary.save_summary_main")
+def test_profile_header_off(mock_save_db, mock_s3, mock_predict, mock_process, monkeypatch):
+    monkeypatch.setenv("PROFILING_ADMIN_TOKEN", "secret")
+    mock_process.return_value = "Extracted text from PDF"
+    mock_save_db.return_value = [{"id": 10}]
+
+    file_tuple = ("test.pdf", io.BytesIO(b"%PDF-1.4 simulated content"), "application/pdf")
+    data = {"user_id": "1", "summary_type": "static", "max_length": "5"}
+
+    response = client.post("/summary/save-summary", data=data, files={"file": file_tuple},
+                           headers={"X-Profile": "0"})
+    assert response.status_code == 200
+    assert "profile_id" not in response.json()
+
+@patch("routers.summary.process_pdf")
+@patch("routers.summary.predict_static")
+@patch("routers.summary.upload_file_to_s3")
+@patch("routers.summary.save_summary_main")
+def test_profiled_save_summary(mock_save_db, mock_s3, mock_predict, mock_process, monkeypatch):
+    monkeypatch.setenv("PROFILING_ADMIN_TOKEN", "secret")
+    mock_process.return_value = "Extracted text from PDF"
+    mock_predict.return_value = "This is a summary"
+    mock_s3.return_value = "https://s3-url.com/test.pdf"
+    # Hold the worker thread long enough for the sampler to catch it
+    mock_save_db.side_effect = lambda **kwargs: time.sleep(0.1) or [{"id": 10}]
+
+    file_tuple = ("test.pdf", io.BytesIO(b"%PDF-1.4 simulated content"), "application/pdf")
+    data = {"user_id": "1", "summary_type": "static", "max_length": "5"}
+    headers = {"X-Profile": "1", "X-Admin-Token": "secret"}
+
+    response = client.post("/summary/save-summary", data=data, files={"file": file_tuple}, headers=headers)
+    assert response.status_code == 200
+    profile_id = response.json()["profile_id"]
+
+    listing = client.get("/admin/profiles/", headers={"X-Admin-Token": "secret"}).json()["data"]
+    meta = next(p for p in listing if p["id"] == profile_id)
+    assert meta["tags"]["document_bytes"] == len(b"%PDF-1.4 simulated content")
+    assert meta["tags"]["summary_type"] == "static"
+    assert meta["tags"]["text_chars"] == len("Extracted text from PDF")
+
+    download = client.get(f"/admin/profiles/{profile_id}", headers={"X-Admin-Token": "secret"})
+    assert download.status_code == 200
+    assert "attachment" in download.headers["content-disposition"]
+    # The stacks come from the threadpool worker, not the idle event loop
+    assert "_summarize_and_store" in download.text
@@ -1,4 +1,7 @@
 import os
+import time
+import threading
+import fcntl
 import boto3
 import pytest
 from moto import mock_aws
@@ -16,9 +19,12 @@ from services.user_services import (
     create_user, 
     user_login, 
     save_summary_main, 
+    save_summary_variants,
     get_user_history, 
     UserLoginModel
 )
+from services.summary_writer import SummaryWriter, is_rejection
+from services.profiling import StackSampler, ProfileStore, to_collapsed
 
 # --- AWS Credentials Fixture ---
 @pytest.fixture(scope="function", autouse=True)
@@ -116,6 +122,18 @@ def test_save_summary_success(mock_supabase):
     result = save_summary_main(1, "doc.pdf", "Short summary", "http://s3...", "bullet", 50)
     assert result[0]["id"] == 100
 
+@patch("services.user_services.supabase")
+def test_save_summary_variants_bulk_insert(mock_supabase):
+    mock_response = MagicMock()
+    mock_response.data = [{"id": 1}, {"id": 2}]
+    mock_supabase.table.return_value.insert.return_value.execute.return_value = mock_response
+
+    result = save_summary_variants(1, "doc.pdf", ["Short", "Long"], "http://s3...", "deep", [60, 150])
+
+    assert [row["id"] for row in result] == [1, 2]
+    rows = mock_supabase.table.return_value.insert.call_args.args[0]
+    assert [(r["summary"], r["summary_length"]) for r in rows] == [("Short", 60), ("Long", 150)]
+
 @patch("services.user_services.supabase")
 def test_get_user_history_not_found(mock_supabase):
     mock_response = MagicMock()
@@ -134,4 +152,204 @@ def test_database_error_handling(mock_supabase):
     user_in = UserSignUpModel(email="err@test.com", password="password123", name="Err")
     with pytest.raises(Exception) as exc:
         create_user(user_in)
-    assert "Database is down" in str(exc.value)
\ No newline at end of file
+    assert "Database is down" in str(exc.value)
+
+# --- WRITE-BEHIND SUMMARY WRITER TESTS ---
+def make_writer(tmp_path, **kwargs):
+    kwargs.setdefault("batch_size", 3)
+    kwargs.setdefault("flush_interval", 0.05)
+    return SummaryWriter(spool_path=str(tmp_path / "spool.jsonl"), **kwargs)
+
+def echo_insert(mock_supabase):
+    """Make the mocked insert return the rows it was given, with ids."""
+    def insert(rows):
+        rows = rows if isinstance(rows, list) else [rows]
+        query = MagicMock()
+        query.execute.return_value.data = [dict(r, id=i) for i, r in enumerate(rows, 1)]
+        return query
+    mock_supabase.table.return_value.insert.side_effect = insert
+
+@patch("services.summary_writer.db")
+def test_summary_writer_batches_rows(mock_db, tmp_path):
+    echo_insert(mock_db.supabase)
+    writer = make_writer(tmp_path, flush_interval=10).start()
+
+    futures = [writer.submit({"filename": f"{i}.pdf"}) for i in range(3)]
+    assert [f.result(timeout=5)["filename"] for f in futures] == ["0.pdf", "1.pdf", "2.pdf"]
+    writer.close()
+
+    # One bulk insert for the full batch, and a clean spool after shutdown
+    assert mock_db.supabase.table.return_value.insert.call_count == 1
+    assert not (tmp_path / f"spool.jsonl.{os.getpid()}").exists()
+
+@patch("services.summary_writer.db")
+def test_summary_writer_compacts_spool(mock_db, tmp_path):
+    echo_insert(mock_db.supabase)
+    writer = make_writer(tmp_path, batch_size=5, flush_interval=10, compact_after=4).start()
+    spool = tmp_path / f"spool.jsonl.{os.getpid()}"
+
+    # Always keep one row pending, so only the ack threshold can compact the spool
+    futures = [writer.submit({"filename": "lead.pdf"})]
+    lines = []
+    for i in range(100):
+        futures += [writer.submit({"filename": f"{i}-{j}.pdf"}) for j in range(5)]
+        for future in futures[:-1]:
+            future.result(timeout=5)
+        lines.append(len(spool.read_text().splitlines()))
+
+    # 500 rows committed, but the spool never holds more than compact_after batches
+    assert max(lines) <= 1 + 4 * (5 + 1)
+    writer.submit({"filename": "last.pdf"}, urgent=True).result(timeout=5)
+    assert spool.read_text() == ""
+    writer.close()
+
+@patch("services.summary_writer.db")
+def test_summary_writer_close_flushes_partial_batch(mock_db, tmp_path):
+    echo_insert(mock_db.supabase)
+    writer = make_writer(tmp_path, flush_interval=10).start()
+
+    future = writer.submit({"filename": "a.pdf"})
+    writer.close()
+
+    assert future.result(timeout=0)["id"] == 1
+
+@patch("services.summary_writer.db")
+def test_summary_writer_replays_spool(mock_db, tmp_path):
+    # Spool left behind by a worker that crashed
+    spool = tmp_path / "spool.jsonl.99999"
+    spool.write_text(
+        '{"op": "add", "id": "a", "row": {"filename": "a.pdf"}}\n'
+        '{"op": "add", "id": "b", "row": {"filename": "b.pdf"}}\n'
+        '{"op": "ack", "ids": ["a"]}\n'
+        '{"op": "add", "id": "c", "row": {"filen'
+    )
+    echo_insert(mock_db.supabase)
+
+    writer = make_writer(tmp_path).start()
+    writer.close()
+
+    # Only the unacknowledged row is re-sent; the torn last line is ignored
+    mock_db.supabase.table.return_value.insert.assert_called_once_with([{"filename": "b.pdf"}])
+    assert not spool.exists()
+
+@patch("services.summary_writer.db")
+def test_summary_writer_skips_spool_of_live_worker(mock_db, tmp_path):
+    spool = tmp_path / "spool.jsonl.99999"
+    spool.write_text('{"op": "add", "id": "a", "row": {"filename": "a.pdf"}}\n')
+    echo_insert(mock_db.supabase)
+
+    # Another worker holds its spool lock while it runs
+    with open(spool) as held:
+        fcntl.flock(held.fileno(), fcntl.LOCK_EX)
+        writer = make_writer(tmp_path).start()
+        writer.close()
+
+    mock_db.supabase.table.return_value.insert.assert_not_called()
+    assert "a.pdf" in spool.read_text()
+
+@patch("services.summary_writer.db")
+def test_summary_writer_retries_transient_api_errors(mock_db, tmp_path):
+    calls = []
+    def insert(rows):
+        calls.append(rows)
+        if len(calls) < 3:
+            raise APIError({"message": "upstream connect error", "code": "503"})
+        query = MagicMock()
+        query.execute.return_value.data = [dict(r, id=i) for i, r in enumerate(rows, 1)]
+        return query
+    mock_db.supabase.table.return_value.insert.side_effect = insert
+
+    writer = make_writer(tmp_path, flush_interval=0.01, rejected_retries=1).start()
+    future = writer.submit({"filename": "a.pdf"}, urgent=True)
+
+    assert future.result(timeout=5)["id"] == 1
+    writer.close()
+    assert writer.dead == 0
+    assert not (tmp_path / "spool.jsonl.dead").exists()
+
+@patch("services.summary_writer.db")
+def test_summary_writer_restart_after_timed_out_close(mock_db, tmp_path):
+    mock_db.supabase.table.return_value.insert.side_effect = APIError({"message": "down", "code": "PGRST001"})
+    writer = make_writer(tmp_path, flush_interval=0.01).start()
+    writer.submit({"filename": "a.pdf"})
+    writer.close(timeout=0.1)
+
+    mock_db.supabase.table.return_value.insert.reset_mock()
+    echo_insert(mock_db.supabase)
+    writer.start()
+    writer.close()
+
+    # The row is inserted once, from the spool, not once per copy in memory
+    mock_db.supabase.table.return_value.insert.assert_called_once_with([{"filename": "a.pdf"}])
+
+def test_is_rejection():
+    assert is_rejection(APIError({"message": "", "code": "23505"}))
+    assert is_rejection(APIError({"message": "", "code": "22P02"}))
+    assert is_rejection(APIError({"message": "", "code": "PGRST204"}))
+    assert is_rejection(APIError({"message": "", "code": 400}))
+    assert not is_rejection(APIError({"message": "", "code": 502}))
+    assert not is_rejection(APIError({"message": "", "code": "PGRST001"}))
+    assert not is_rejection(APIError({"message": "", "code": "429"}))
+    assert not is_rejection(APIError({"message": "", "code": None}))
+
+@patch("services.summary_writer.db")
+def test_summary_writer_dead_letters_rejected_row(mock_db, tmp_path):
+    def insert(rows):
+        if isinstance(rows, list) or rows["filename"] == "bad.pdf":
+            raise APIError({"message": "violates foreign key", "code": "23503"})
+        query = MagicMock()
+        query.execute.return_value.data = [dict(rows, id=1)]
+        return query
+    mock_db.supabase.table.return_value.insert.side_effect = insert
+
+    writer = make_writer(tmp_path, batch_size=2, flush_interval=0.01, rejected_retries=1).start()
+    good = writer.submit({"filename": "good.pdf"})
+    bad = writer.submit({"filename": "bad.pdf"})
+    writer.close()
+
+    assert good.result(timeout=0)["id"] == 1
+    with pytest.raises(Exception) as exc:
+        bad.result(timeout=0)
+    assert "violates foreign key" in str(exc.value)
+    assert "bad.pdf" in (tmp_path / "spool.jsonl.dead").read_text()
+
+@patch("services.user_services.summary_writer")
+def test_save_summary_waits_for_commit(mock_writer):
+    mock_writer.running = True
+    mock_writer.submit.return_value.result.return_value = {"id": 7, "filename": "doc.pdf"}
+
+    result = save_summary_main(1, "doc.pdf", "Short summary", "http://s3...", "static", 3)
+
+    assert result[0]["id"] == 7
+    mock_writer.submit.assert_called_once()
+    assert mock_writer.submit.call_args.kwargs["urgent"] is True
+
+
+# --- PROFILING TESTS ---
+def busy_wait(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def test_stack_sampler_collapses_thread_stacks():
+    sampler = StackSampler(interval=0.001, thread_id=threading.get_ident()).start()
+    busy_wait(0.2)
+    stacks = sampler.stop()
+
+    assert sampler.samples > 0
+    assert any("busy_wait" in stack for stack in stacks)
+    line = to_collapsed(stacks).splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert ";" in stack and int(count) > 0
+
+def test_profile_store_persists_to_directory(tmp_path):
+    sampler = StackSampler(interval=0.001, thread_id=threading.get_ident()).start()
+    busy_wait(0.05)
+    sampler.stop()
+
+    meta = ProfileStore(directory=str(tmp_path)).save(sampler, "request", {"summary_type": "deep"})
+
+    # A fresh store (e.g. after a restart) can still serve it from disk
+    found_meta, collapsed = ProfileStore(directory=str(tmp_path)).get(meta["id"])
+    assert found_meta["tags"]["summary_type"] == "deep"
+    assert collapsed == to_collapsed(sampler.stacks)